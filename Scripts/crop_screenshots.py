@@ -1,14 +1,35 @@
 import argparse
 from enum import Enum
+from collections import OrderedDict
 import os
 import sys
-import glob
+import bisect
+import functools
+import re
+import mmap
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image, ImageOps, ImageFilter
 import numpy as np
-from scipy import fftpack
-import tkinter as tk
-from tkinter import ttk, Canvas, Scale, IntVar, StringVar
-from PIL import ImageTk
+from scipy import fft as scipyfft
+
+# tkinter and ImageTk are only imported when the GUI is launched, see init_gui()
+tk = ttk = Canvas = Scale = IntVar = StringVar = ImageTk = None
+
+try:
+    import numba # Optional - JIT compiles the NCC scoring used by the auto alignment
+except ImportError:
+    numba = None
+
+try:
+    import cv2 # Optional - SIMD grayscale conversion for the auto alignment and the FIND_EDGES filter in measure_detail
+except ImportError:
+    cv2 = None
+
+try:
+    import tifffile # Optional - streams the large test map to a tiled BigTIFF instead of building it in memory
+except ImportError:
+    tifffile = None
 
 # Configuration - Make sure this matches the Enfusion Workbench tool settings
 TILE_CROP_SIZE = 550 # pixels - Set this initially to be too large for perfect tiling
@@ -17,13 +38,40 @@ TILE_OVERLAP = -7  # pixels - Then adjust this value to get the perfect tiling t
 # Optional configuration
 SKIP_EXISTING_TILES = True # Skip creating tiles that already exist
 DELETE_ORIGINALS = False # Delete the original screenshots after cropping the tiles to save disk space
+MAX_CACHED_TILES = 64 # Decoded screenshot/tile images kept open at once, the least recently used are closed first
 
 INTERMEDIATE_TILE_FILENAME_SUFFIX = "tile" # only change this if you have also changed the Enfusion Workbench settings
 FINAL_TILE_FILENAME = "tile"
+
+# incoming screenshot filenames are in the format
+# {prefix}_{x}_{z}.png - The original full resolution screenshot
+# {prefix}_{x}_{z}_tile.png - The cropped tile
+SCREENSHOT_FILENAME_PATTERN = re.compile(rf"(?:.*_)?(-?\d+)_(-?\d+)(_{re.escape(INTERMEDIATE_TILE_FILENAME_SUFFIX)})?\.png")
 FINAL_TILE_IMAGE_TYPE = "jpg"
 
+# ITU-R BT.601 luma weights for converting RGB to grayscale
+BT601_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+# Pillow's FIND_EDGES 3x3 kernel (scale 1, offset 0) for running the same filter through OpenCV
+FIND_EDGES_KERNEL = np.array(ImageFilter.FIND_EDGES.filterargs[3], dtype=np.float32).reshape(ImageFilter.FIND_EDGES.filterargs[0])
+
+# Encoder settings used when a tile is written as a JPEG (4:2:0 subsampling, optimized huffman tables)
+TILE_JPEG_SAVE_OPTIONS = {"quality": 95, "optimize": True, "progressive": True, "subsampling": "4:2:0"}
+# Encoder settings for the initial zoom level tiles, these are re-encoded again by create_zoom_levels.py so favour speed
+INITIAL_TILE_SAVE_OPTIONS = {"quality": 90, "subsampling": "4:2:0", "optimize": False, "progressive": False}
+
+# Tile size of the BigTIFF written for .tif/.tiff test maps, this is also the height of the row bands kept in memory
+COMPOSITE_TIFF_TILE_SIZE = 512 # pixels - must be a multiple of 16
+
+# The alignment GUI's overlap suggestion NCC scores +-OVERLAP_REFINE_RADIUS pixels around this many phase correlation peaks
+OVERLAP_PEAK_CANDIDATES = 8
+OVERLAP_REFINE_RADIUS = 3
+
 
 class Screenshot():
+    # No per instance __dict__, there can be thousands of these
+    __slots__ = ("xCoordWS", "zCoordWS", "_screenshot_filepath", "_tile_filepath", "_screenshot_image", "_tile_image", "_hash", "_tile_cache")
+
     xCoordWS: int
     zCoordWS: int
     # This has two images, the full resolution raw screenshot, and the cropped tile
@@ -32,6 +80,8 @@ class Screenshot():
     _tile_filepath: str
     _screenshot_image: Image
     _tile_image: Image
+    # The owning ScreenshotProcessor's LRU of loaded images, None until the screenshot is added to one
+    _tile_cache: "OrderedDict[tuple[int, str], Screenshot]|None"
 
     def __init__(self, xCoordWS: int, zCoordWS: int, screenshot_filepath: str|None = None, tile_filepath: str|None = None):
         self.xCoordWS = xCoordWS
@@ -40,6 +90,8 @@ class Screenshot():
         self._tile_filepath = tile_filepath
         self._screenshot_image = None
         self._tile_image = None
+        self._hash = hash((xCoordWS, zCoordWS))
+        self._tile_cache = None
 
     def __str__(self):
         return f"Screenshot {self.xCoordWS}x{self.zCoordWS}, screenshot_filepath={self.screenshot_filepath}, tile_filepath={self.tile_filepath}"
@@ -49,16 +101,48 @@ class Screenshot():
         if self._screenshot_image is None:
             if os.path.exists(self.screenshot_filepath):            
                 self._screenshot_image = Image.open(self.screenshot_filepath)
+                # let libjpeg decode straight to RGB at native resolution (no-op for PNG)
+                self._screenshot_image.draft("RGB", self._screenshot_image.size)
             else:
                 raise RuntimeError(f"Screenshot image not found at {self.screenshot_filepath}")
+        self._touch_image("_screenshot_image")
         return self._screenshot_image
 
     @property
     def tile_image(self) -> Image.Image:
         if self._tile_image is None:
             self._tile_image = Image.open(self.tile_filepath)
+        self._touch_image("_tile_image")
         return self._tile_image
 
+    def _touch_image(self, slot: str):
+        # mark the image as most recently used in the processor's cache and close the oldest ones once there are too many
+        tile_cache = self._tile_cache
+        if tile_cache is None:
+            return
+        key = (id(self), slot)
+        tile_cache[key] = self
+        tile_cache.move_to_end(key)
+        while len(tile_cache) > max(MAX_CACHED_TILES, 1):
+            (_, evicted_slot), screenshot = tile_cache.popitem(last=False)
+            screenshot._close_image(evicted_slot)
+
+    def _close_image(self, slot: str):
+        image = getattr(self, slot)
+        if image is not None:
+            setattr(self, slot, None)
+            image.close()
+
+    def load_tile_pixels(self) -> Image.Image:
+        """Decode the tile straight from a read only mmap of its file, without caching it on the screenshot."""
+        with open(self.tile_filepath, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            # the file is read front to back once, let the kernel read ahead and drop the pages behind us
+            if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            with Image.open(mapped) as image:
+                image.draft("RGB", image.size)
+                return image.convert("RGB")
+
     @property
     def screenshot_filepath(self):
         return self._screenshot_filepath
@@ -69,16 +153,35 @@ class Screenshot():
             return self._tile_filepath
         return self.generate_tile_path()
 
+    def merge_filepaths(self, other: "Screenshot"):
+        # The screenshot and its tile are found as separate files for the same coordinate
+        if self._screenshot_filepath is None:
+            self._screenshot_filepath = other._screenshot_filepath
+        if self._tile_filepath is None:
+            self._tile_filepath = other._tile_filepath
+
     def unload(self):
-        self._screenshot_image = None
-        self._tile_image = None
+        for slot in ("_screenshot_image", "_tile_image"):
+            if self._tile_cache is not None:
+                self._tile_cache.pop((id(self), slot), None)
+            self._close_image(slot)
+
+    def attach_tile_cache(self, tile_cache: "OrderedDict[tuple[int, str], Screenshot]"):
+        # release anything loaded under a previous processor so its cache doesn't keep this screenshot alive
+        self.unload()
+        self._tile_cache = tile_cache
 
     def generate_tile_path(self):
         # take filepath, strip of .png, and add output_file_suffix + output_tile_type
         return self.screenshot_filepath.replace(".png", f"_{INTERMEDIATE_TILE_FILENAME_SUFFIX}.png")
     
+    @property
+    def coordinates(self) -> tuple[int, int]:
+        return (self.xCoordWS, self.zCoordWS)
+
     @property
     def coordinate_string(self) -> str:
+        # human readable, use coordinates for lookups
         return self.make_coordinate_string(self.xCoordWS, self.zCoordWS)
     
     @classmethod
@@ -91,30 +194,174 @@ class Screenshot():
         return self.xCoordWS == other.xCoordWS and self.zCoordWS == other.zCoordWS
 
     def __hash__(self) -> int:
-        return hash(self.coordinate_string)
+        return self._hash
     
+    @staticmethod
+    def center_crop_box(width: int, height: int, crop_size: int) -> tuple[int, int, int, int]:
+        left = (width - crop_size) // 2
+        top = (height - crop_size) // 2
+        return (left, top, left + crop_size, top + crop_size)
+
+    @staticmethod
+    def tile_save_options(filepath: str) -> dict:
+        # JPEG encoder options only make sense for JPEG output, PNG has its own (slow) "optimize" flag
+        if os.path.splitext(filepath)[1].lower() in (".jpg", ".jpeg"):
+            return TILE_JPEG_SAVE_OPTIONS
+        return {}
+
     def create_tile(self):
-        # crop the center of the image to crop_size x crop_size
-        width, height = self.screenshot_image.size
-        left = (width - TILE_CROP_SIZE) / 2
-        top = (height - TILE_CROP_SIZE) / 2
-        right = (width + TILE_CROP_SIZE) / 2
-        bottom = (height + TILE_CROP_SIZE) / 2
-        cropped_image = self.screenshot_image.crop((left, top, right, bottom))
-        # set the jpeg quality to 95
-        cropped_image.save(self.tile_filepath, quality=95)
+        # crop the center of the image to crop_size x crop_size, this opens the screenshot itself rather than
+        # through screenshot_image so the full resolution image isn't kept in memory afterwards
+        _crop_one((self.screenshot_filepath, self.tile_filepath, TILE_CROP_SIZE))
 
     def tile_exists(self):
         return os.path.exists(self.tile_filepath)
-    
-    def get_unit_coordinates(self, min_x: int, min_z: int, filename_coordinate_step: int):
-        return (int((self.xCoordWS - min_x) / filename_coordinate_step), int((self.zCoordWS - min_z) / filename_coordinate_step))
+
+
+def _crop_one(job: tuple[str, str, int]):
+    # Process pool worker - only takes paths and ints so the job is cheap to pickle
+    screenshot_filepath, tile_filepath, crop_size = job
+    with Image.open(screenshot_filepath) as image:
+        image.draft("RGB", image.size)
+        width, height = image.size
+        cropped_image = image.crop(Screenshot.center_crop_box(width, height, crop_size))
+        cropped_image.save(tile_filepath, **Screenshot.tile_save_options(tile_filepath))
+    return tile_filepath
+
+
+def _crop_worker(job: tuple[str, str, int]):
+    # Process pool worker for make_initial_tiles - copies a tile, or center crops it to the target size and re-encodes it
+    tile_filepath, initial_tile_filepath, target_size = job
+    same_format = os.path.splitext(tile_filepath)[1].lower() == os.path.splitext(initial_tile_filepath)[1].lower()
+    with Image.open(tile_filepath) as image:
+        # opening only reads the header, a tile that is already the right size and format is copied byte for byte
+        width, height = image.size
+        if same_format and width == target_size and height == target_size:
+            shutil.copyfile(tile_filepath, initial_tile_filepath)
+            return initial_tile_filepath
+        image.draft("RGB", image.size)
+        if width != target_size or height != target_size:
+            image = image.crop(Screenshot.center_crop_box(width, height, target_size))
+        image.save(initial_tile_filepath, **INITIAL_TILE_SAVE_OPTIONS)
+    return initial_tile_filepath
+
+
+@functools.lru_cache(maxsize=8)
+def high_frequency_weights(h: int, w: int, radius: int) -> tuple[np.ndarray, np.ndarray]:
+    """Weights for summing an rfft2 magnitude of an (h, w) image as if it were the full spectrum.
+
+    Returns the per column weights, and the same weights masked to the frequencies outside radius.
+    """
+    # every column but the zero frequency (and the Nyquist one for even widths) stands in for its mirrored twin
+    column_weights = np.full(w // 2 + 1, 2, dtype=np.float32)
+    column_weights[0] = 1
+    if w % 2 == 0:
+        column_weights[-1] = 1
+    y = scipyfft.fftfreq(h, 1 / h)[:, None]
+    x = np.arange(w // 2 + 1)[None, :]
+    high_freq_weights = np.where(y**2 + x**2 > radius**2, column_weights, np.float32(0))
+    column_weights.flags.writeable = False
+    high_freq_weights.flags.writeable = False
+    return column_weights, high_freq_weights
+
+
+def init_gui():
+    """Import the GUI modules on first use, so batch runs on headless machines don't load Tk."""
+    global tk, ttk, Canvas, Scale, IntVar, StringVar, ImageTk
+    try:
+        import tkinter as tk
+        from tkinter import ttk, Canvas, Scale, IntVar, StringVar
+    except ImportError as e:
+        raise RuntimeError(f"GUI requested but tkinter is unavailable: {e}")
+    try:
+        from PIL import ImageTk
+    except ImportError:
+        # Some distributions package ImageTk separately, the preview then uses Tk's own PhotoImage
+        ImageTk = None
+
+
+def blit(canvas: np.ndarray, image, x: int, y: int):
+    """Copy an RGB image (or array) into a (H, W, 3) uint8 array at x, y, clipped to the array bounds."""
+    pixels = np.asarray(image)
+    top, left = max(y, 0), max(x, 0)
+    bottom = min(y + pixels.shape[0], canvas.shape[0])
+    right = min(x + pixels.shape[1], canvas.shape[1])
+    if bottom > top and right > left:
+        canvas[top:bottom, left:right] = pixels[top - y:bottom - y, left - x:right - x]
+
+
+def to_grayscale(image) -> np.ndarray:
+    """ITU-R BT.601 luma of an RGB image (or array) as a float32 array."""
+    pixels = np.asarray(image)
+    if pixels.ndim == 2:
+        return pixels.astype(np.float32)
+    if cv2 is not None:
+        return cv2.cvtColor(np.ascontiguousarray(pixels[..., :3]), cv2.COLOR_RGB2GRAY).astype(np.float32)
+    return pixels[..., :3] @ BT601_WEIGHTS
+
+
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _ncc_score(a, b):
+        """Normalized cross-correlation between two (H, W) float32 arrays."""
+        rows, cols = a.shape
+        mean_a = a.mean()
+        mean_b = b.mean()
+        numerator = 0.0
+        sum_a = 0.0
+        sum_b = 0.0
+        for i in numba.prange(rows):
+            for j in range(cols):
+                da = a[i, j] - mean_a
+                db = b[i, j] - mean_b
+                numerator += da * db
+                sum_a += da * da
+                sum_b += db * db
+        denominator = np.sqrt(sum_a * sum_b)
+        if denominator == 0.0:
+            return 0.0
+        return numerator / denominator
+else:
+    def _ncc_score(a, b):
+        """Normalized cross-correlation between two (H, W) float32 arrays."""
+        denominator = a.std() * b.std() * a.size
+        if denominator == 0:
+            return 0.0
+        return float(((a - a.mean()) * (b - b.mean())).sum() / denominator)
+
+
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _score_rows(tgt_norm, src_norm, src_den):
+        """Per channel NCC of every row of a centred (H, W, C) float32 array against a centred (W, C) row."""
+        rows, cols, channels = tgt_norm.shape
+        scores = np.zeros((rows, channels), dtype=np.float32)
+        for i in numba.prange(rows):
+            for c in range(channels):
+                numerator = 0.0
+                sum_sq = 0.0
+                for j in range(cols):
+                    t = tgt_norm[i, j, c]
+                    numerator += t * src_norm[j, c]
+                    sum_sq += t * t
+                denominator = np.sqrt(sum_sq) * src_den[c]
+                if denominator != 0.0:
+                    scores[i, c] = numerator / denominator
+        return scores
+else:
+    def _score_rows(tgt_norm, src_norm, src_den):
+        """Per channel NCC of every row of a centred (H, W, C) float32 array against a centred (W, C) row."""
+        numerator = np.einsum('hwc,wc->hc', tgt_norm, src_norm)
+        denominator = np.sqrt(np.einsum('hwc,hwc->hc', tgt_norm, tgt_norm)) * src_den
+        # Avoid division by zero
+        return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
 
 
 class TileAlignmentGUI:
     """GUI for aligning screenshot tiles and finding the optimal overlap value."""
     
     def __init__(self, root, processor):
+        init_gui()
         self.root = root
         self.processor = processor
         self.root.title("Tile Alignment Tool")
@@ -129,6 +376,12 @@ class TileAlignmentGUI:
         self.valid_tile_sets = self.find_valid_tile_sets()
         if not self.valid_tile_sets:
             raise RuntimeError("Could not find any adjacent tiles to align")
+        self.set_index_by_tile = {tile_set['tile']: i for i, tile_set in enumerate(self.valid_tile_sets)}
+        
+        # Decoded images per tile coordinate, and their crops per (x, z, crop size, preview scale)
+        self._image_cache: dict[tuple[int, int], tuple[Image.Image, bool]] = {}
+        self._crop_cache: dict[tuple[int, int, int, float], Image.Image] = {}
+        self._crop_cache_size = None
         
         # Current set index
         self.current_set_index = 0
@@ -138,6 +391,7 @@ class TileAlignmentGUI:
         self.overlap_var = IntVar(value=abs(TILE_OVERLAP))
         self.crop_size_var = IntVar(value=TILE_CROP_SIZE)
         self.direction_var = StringVar(value="Horizontal" if self.horizontal_neighbor else "Vertical")
+        self._pending_after = None  # id of the scheduled slider preview render
         
         # Keep track of original values for reset functionality
         self.original_overlap = TILE_OVERLAP
@@ -152,15 +406,17 @@ class TileAlignmentGUI:
     def find_valid_tile_sets(self):
         """Find all tiles that have at least one neighbor."""
         valid_sets = []
+        step = self.processor.tile_step_size
         
-        for tile in self.tiles:
-            h_neighbor = self.processor.find_neighbour(tile, self.processor.tile_step_size, 0)
-            v_neighbor = self.processor.find_neighbour(tile, 0, self.processor.tile_step_size)
+        for index, tile in enumerate(self.tiles):
+            h_neighbor = self.processor.find_neighbour(tile, step, 0)
+            v_neighbor = self.processor.find_neighbour(tile, 0, step)
             
             # If this tile has at least one neighbor, it's a valid set
             if h_neighbor or v_neighbor:
                 valid_sets.append({
                     'tile': tile,
+                    'index': index,
                     'h_neighbor': h_neighbor,
                     'v_neighbor': v_neighbor
                 })
@@ -170,15 +426,13 @@ class TileAlignmentGUI:
     def load_current_tile_set(self):
         """Load the current tile set based on the current_set_index."""
         current_set = self.valid_tile_sets[self.current_set_index]
+        self.clear_image_cache()
         self.current_tile = current_set['tile']
         self.horizontal_neighbor = current_set['h_neighbor']
         self.vertical_neighbor = current_set['v_neighbor']
         
         # Update selected tile index for the dropdown selector
-        for i, tile in enumerate(self.tiles):
-            if tile == self.current_tile:
-                self.selected_tile_index = i
-                break
+        self.selected_tile_index = current_set['index']
     
     def next_set(self):
         """Move to the next valid tile set."""
@@ -225,6 +479,16 @@ class TileAlignmentGUI:
         self.canvas = Canvas(main_frame, width=1200, height=600, bg="black")
         self.canvas.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
         
+        # A single resident preview image that update_preview pastes into, instead of recreating canvas items
+        self.preview_frame = Image.new("RGB", (1200, 600))
+        if ImageTk is not None:
+            self.preview_photo = ImageTk.PhotoImage(self.preview_frame)
+        else:
+            self.preview_photo = tk.PhotoImage(width=1200, height=600)
+        self._canvas_item = self.canvas.create_image(600, 300, image=self.preview_photo)
+        # Likewise a single message item that is shown or hidden, so repeated errors don't pile up canvas items
+        self._err_text = self.canvas.create_text(600, 300, text="", fill="white", font=("Arial", 16), state="hidden")
+        
         # Navigation frame - add this above the controls
         nav_frame = ttk.Frame(main_frame, padding="5")
         nav_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E))
@@ -253,6 +517,7 @@ class TileAlignmentGUI:
                               variable=self.overlap_var, command=self.on_overlap_change,
                               length=300)
         overlap_slider.grid(row=0, column=1, sticky=(tk.W, tk.E))
+        overlap_slider.bind("<ButtonRelease-1>", self.on_slider_release)
         
         # Add numeric entry field for precise overlap value
         ttk.Label(controls_frame, text="Value:").grid(row=0, column=2, sticky=tk.W, padx=(5, 0))
@@ -267,6 +532,7 @@ class TileAlignmentGUI:
                                variable=self.crop_size_var, command=self.on_crop_size_change,
                                length=300)
         crop_size_slider.grid(row=1, column=1, sticky=(tk.W, tk.E))
+        crop_size_slider.bind("<ButtonRelease-1>", self.on_slider_release)
         
         # Add numeric entry field for precise crop size value
         ttk.Label(controls_frame, text="Value:").grid(row=1, column=2, sticky=tk.W, padx=(5, 0))
@@ -307,10 +573,14 @@ class TileAlignmentGUI:
         # Reset button
         ttk.Button(button_frame, text="Reset to Original", command=self.reset_to_original).grid(row=0, column=2, padx=(10, 0))
         
+        # Suggest overlap button
+        ttk.Button(button_frame, text="Suggest Overlap", command=self.auto_suggest_overlap).grid(row=0, column=3, padx=(10, 0))
+        
         # Configure button frame columns
         button_frame.columnconfigure(0, weight=1)
         button_frame.columnconfigure(1, weight=1)
         button_frame.columnconfigure(2, weight=1)
+        button_frame.columnconfigure(3, weight=1)
         
         # Info label
         self.info_var = StringVar(value=self.get_info_text())
@@ -348,7 +618,7 @@ class TileAlignmentGUI:
         self.overlap_entry.delete(0, tk.END)
         self.overlap_entry.insert(0, str(self.overlap_var.get()))
         
-        self.update_preview()
+        self.schedule_preview()
         self.info_var.set(self.get_info_text())
         
     def on_overlap_entry_change(self, event):
@@ -374,7 +644,7 @@ class TileAlignmentGUI:
         self.crop_size_entry.delete(0, tk.END)
         self.crop_size_entry.insert(0, str(self.crop_size_var.get()))
         
-        self.update_preview()
+        self.schedule_preview()
         self.info_var.set(self.get_info_text())
         
     def on_crop_size_entry_change(self, event):
@@ -395,6 +665,23 @@ class TileAlignmentGUI:
             self.crop_size_entry.delete(0, tk.END)
             self.crop_size_entry.insert(0, str(self.crop_size_var.get()))
         
+    def schedule_preview(self):
+        """Coalesce slider updates so the preview is rendered at most once every 40ms."""
+        if self._pending_after is not None:
+            self.root.after_cancel(self._pending_after)
+        self._pending_after = self.root.after(40, self._do_update_preview)
+        
+    def _do_update_preview(self):
+        self._pending_after = None
+        self.update_preview()
+        
+    def on_slider_release(self, event):
+        # Render the final value straight away once the slider has been let go
+        if self._pending_after is not None:
+            self.root.after_cancel(self._pending_after)
+            self._pending_after = None
+        self.update_preview()
+        
     def on_direction_change(self, *args):
         self.update_preview()
         self.info_var.set(self.get_info_text())
@@ -403,18 +690,15 @@ class TileAlignmentGUI:
         idx = self.tile_selector.current()
         self.selected_tile_index = idx
         self.current_tile = self.tiles[idx]
+        self.clear_image_cache()
         
         # Find neighbors for the new current tile
-        self.horizontal_neighbor = self.processor.find_neighbour(
-            self.current_tile, self.processor.tile_step_size, 0)
-        self.vertical_neighbor = self.processor.find_neighbour(
-            self.current_tile, 0, self.processor.tile_step_size)
+        step = self.processor.tile_step_size
+        self.horizontal_neighbor = self.processor.find_neighbour(self.current_tile, step, 0)
+        self.vertical_neighbor = self.processor.find_neighbour(self.current_tile, 0, step)
         
         # Find matching set in valid_tile_sets
-        for i, tile_set in enumerate(self.valid_tile_sets):
-            if tile_set['tile'] == self.current_tile:
-                self.current_set_index = i
-                break
+        self.current_set_index = self.set_index_by_tile.get(self.current_tile, self.current_set_index)
         
         # If the current direction is no longer valid, switch it
         if self.direction_var.get() == "Horizontal" and not self.horizontal_neighbor:
@@ -435,86 +719,137 @@ class TileAlignmentGUI:
         self.update_preview()
         self.info_var.set(self.get_info_text())
     
-    def get_image_for_tile(self, tile):
-        """Try to get either tile_image or screenshot_image, with appropriate fallback handling."""
-        try:
+    def clear_image_cache(self):
+        """Drop the decoded images, e.g. when switching tile sets or after regenerating tiles."""
+        self._image_cache.clear()
+        self._crop_cache.clear()
+        
+    def load_image_for_tile(self, tile):
+        """Decode the tile or screenshot image once, returns the image and whether it still needs cropping."""
+        key = (tile.xCoordWS, tile.zCoordWS)
+        if key not in self._image_cache:
             # First try to use the tile image if it exists
             if os.path.exists(tile.tile_filepath):
-                return tile.tile_image.copy()
+                self._image_cache[key] = (tile.tile_image.convert("RGB"), False)
             # Fall back to the screenshot image if tile doesn't exist
             elif tile.screenshot_filepath and os.path.exists(tile.screenshot_filepath):
-                # If we're using screenshot images, we need to crop them to the active crop size
-                img = tile.screenshot_image.copy()
-                width, height = img.size
-                crop_size = self.crop_size_var.get()
-                left = (width - crop_size) / 2
-                top = (height - crop_size) / 2
-                right = (width + crop_size) / 2
-                bottom = (height + crop_size) / 2
-                return img.crop((left, top, right, bottom))
+                self._image_cache[key] = (tile.screenshot_image.convert("RGB"), True)
             else:
                 raise RuntimeError(f"No image found for tile at {tile.xCoordWS}x{tile.zCoordWS}. "
                                   f"Tried {tile.tile_filepath} and {tile.screenshot_filepath}")
+        return self._image_cache[key]
+        
+    def get_tile_size(self, tile):
+        """Full resolution size of the (square) tile image, without cropping or scaling it."""
+        try:
+            img, needs_crop = self.load_image_for_tile(tile)
+        except Exception:
+            return self.crop_size_var.get()
+        return self.crop_size_var.get() if needs_crop else img.width
+        
+    def get_image_for_tile(self, tile, scale=1.0):
+        """Try to get either tile_image or screenshot_image, with appropriate fallback handling.
+        
+        A scale below 1 returns a downscaled copy for the preview, so it never handles full resolution pixels.
+        """
+        crop_size = self.crop_size_var.get()
+        if crop_size != self._crop_cache_size:
+            # Crops at the previous size won't be used again, the overlap alone doesn't change them
+            self._crop_cache.clear()
+            self._crop_cache_size = crop_size
+        
+        key = (tile.xCoordWS, tile.zCoordWS, crop_size, scale)
+        if key in self._crop_cache:
+            return self._crop_cache[key]
+        try:
+            img, needs_crop = self.load_image_for_tile(tile)
+            if needs_crop:
+                # If we're using screenshot images, we need to crop them to the active crop size
+                width, height = img.size
+                img = img.crop(Screenshot.center_crop_box(width, height, crop_size))
+            if scale < 1:
+                scaled_size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+                img = img.resize(scaled_size, Image.Resampling.BILINEAR, reducing_gap=2.0)
         except Exception as e:
             print(f"Error loading image for {tile.xCoordWS}x{tile.zCoordWS}: {e}")
             # Create a blank image as a last resort
-            return Image.new("RGB", (self.crop_size_var.get(), self.crop_size_var.get()), "gray")
+            blank_size = max(1, round(crop_size * scale))
+            return Image.new("RGB", (blank_size, blank_size), "gray")
+        self._crop_cache[key] = img
+        return img
+        
+    def show_message(self, message):
+        """Hide the preview image and show a message in the middle of the canvas."""
+        self.canvas.itemconfigure(self._canvas_item, state="hidden")
+        self.canvas.itemconfigure(self._err_text, text=message, state="normal")
+        
+    def show_preview_frame(self):
+        """Copy the preview frame into the resident PhotoImage."""
+        if ImageTk is not None:
+            # ImageTk blits the pixels straight into Tk's photo block from C
+            self.preview_photo.paste(self.preview_frame)
+        else:
+            # Hand Tk the raw pixels as a binary PPM in one put, rather than a per pixel color list
+            width, height = self.preview_frame.size
+            ppm_header = f"P6 {width} {height} 255\n".encode("ascii")
+            self.preview_photo.put(ppm_header + self.preview_frame.tobytes(), to=(0, 0))
         
     def update_preview(self):
-        self.canvas.delete("all")
-        
         # Get the current settings
         overlap = self.overlap_var.get()
-        crop_size = self.crop_size_var.get()
+        horizontal = self.direction_var.get() == "Horizontal"
+        canvas_width = 1200
+        canvas_height = 600
         
         try:
-            # Load current tile image
-            current_img = self.get_image_for_tile(self.current_tile)
-            img_size = current_img.size[0]  # Assuming square tiles
-            
             neighbor = self.get_neighbor_for_current_direction()
             if not neighbor:
-                self.canvas.create_text(
-                    600, 300, text="No neighbor available in this direction", fill="white", font=("Arial", 16))
+                self.show_message("No neighbor available in this direction")
                 return
             
-            # Load neighbor tile image
-            neighbor_img = self.get_image_for_tile(neighbor)
+            # Scale the tiles so two of them fit the canvas, this doesn't depend on the overlap so the
+            # scaled tiles stay cached while the overlap slider moves
+            tile_size = self.get_tile_size(self.current_tile)
+            if horizontal:
+                scale = min(1.0, canvas_width / (2 * tile_size), canvas_height / tile_size)
+            else:
+                scale = min(1.0, canvas_width / tile_size, canvas_height / (2 * tile_size))
+            
+            # Load the preview sized tile images
+            current_img = self.get_image_for_tile(self.current_tile, scale)
+            neighbor_img = self.get_image_for_tile(neighbor, scale)
+            img_size = current_img.size[0]  # Assuming square tiles
+            overlap = round(overlap * scale)
             
             # Create a composite image based on the direction
-            if self.direction_var.get() == "Horizontal":
+            if horizontal:
                 # Horizontal alignment (neighbor on the right)
                 composite_width = img_size * 2 - overlap
                 composite_height = img_size
-                composite = Image.new("RGB", (composite_width, composite_height))
-                composite.paste(current_img, (0, 0))
-                composite.paste(neighbor_img, (img_size - overlap, 0))
+                neighbor_position = (img_size - overlap, 0)
             else:
                 # Vertical alignment (neighbor below)
                 composite_width = img_size
                 composite_height = img_size * 2 - overlap
-                composite = Image.new("RGB", (composite_width, composite_height))
-                composite.paste(current_img, (0, 0))
-                composite.paste(neighbor_img, (0, img_size - overlap))
+                neighbor_position = (0, img_size - overlap)
+            
+            # Assemble the composite in a NumPy buffer, the slice assignments are plain memory copies
+            buffer = np.zeros((composite_height, composite_width, 3), dtype=np.uint8)
+            blit(buffer, current_img, 0, 0)
+            blit(buffer, neighbor_img, *neighbor_position)
+            composite = Image.fromarray(buffer)
             
             # Draw gridlines
             self.draw_gridlines(composite, img_size, overlap)
             
-            # Resize if needed to fit the canvas
-            canvas_width = 1200
-            canvas_height = 600
-            scale_factor = min(canvas_width / composite_width, canvas_height / composite_height)
-            
-            if scale_factor < 1:
-                new_size = (int(composite_width * scale_factor), int(composite_height * scale_factor))
-                composite = composite.resize(new_size, Image.LANCZOS)
-            
-            # Convert to PhotoImage and display
-            self.photo = ImageTk.PhotoImage(composite)
-            self.canvas.create_image(canvas_width // 2, canvas_height // 2, image=self.photo)
+            # Paste into the resident PhotoImage, centered on a black background
+            self.preview_frame.paste((0, 0, 0), (0, 0, canvas_width, canvas_height))
+            self.preview_frame.paste(composite, ((canvas_width - composite.width) // 2, (canvas_height - composite.height) // 2))
+            self.show_preview_frame()
+            self.canvas.itemconfigure(self._err_text, state="hidden")
+            self.canvas.itemconfigure(self._canvas_item, state="normal")
         except Exception as e:
-            self.canvas.create_text(
-                600, 300, text=f"Error creating preview: {str(e)}", fill="white", font=("Arial", 16))
+            self.show_message(f"Error creating preview: {str(e)}")
             import traceback
             traceback.print_exc()
     
@@ -565,6 +900,77 @@ class TileAlignmentGUI:
         self.update_preview()
         self.info_var.set("Reset to original values. " + self.get_info_text())
     
+    def estimate_overlap(self, current_img, neighbor_img, horizontal, max_overlap=200):
+        """Estimate the overlap in pixels between two neighbouring tiles using FFT phase correlation.
+
+        Phase correlation gives the candidate overlaps, which are then refined by NCC scoring the actual
+        overlapping pixels in a small window around each of the strongest peaks.
+        """
+        current = to_grayscale(current_img)
+        neighbor = to_grayscale(neighbor_img)
+        if not horizontal:
+            # The neighbor is below, transpose so it's on the right like the horizontal case
+            current = current.T
+            neighbor = neighbor.T
+        
+        # Only the touching edges can overlap, so correlate the right strip of the current tile
+        # with the left strip of the neighbor
+        rows = min(current.shape[0], neighbor.shape[0])
+        strip_width = min(2 * max_overlap, current.shape[1], neighbor.shape[1])
+        current_strip = current[:rows, -strip_width:]
+        neighbor_strip = neighbor[:rows, :strip_width]
+        
+        # Hamming window across the rows to suppress the edge artefacts, the overlap itself
+        # sits on the strip edges so the columns are left unwindowed
+        window = np.hamming(rows).astype(np.float32)[:, np.newaxis]
+        current_strip = (current_strip - current_strip.mean()) * window
+        neighbor_strip = (neighbor_strip - neighbor_strip.mean()) * window
+        
+        # Zero pad the columns so the correlation doesn't wrap around, rounding both axes up
+        # to sizes the FFT handles quickly
+        shape = (scipyfft.next_fast_len(rows, real=True), scipyfft.next_fast_len(2 * strip_width, real=True))
+        cross_power = scipyfft.rfft2(current_strip, s=shape, workers=-1)
+        cross_power *= np.conj(scipyfft.rfft2(neighbor_strip, s=shape, workers=-1))
+        cross_power /= np.abs(cross_power) + 1e-9
+        correlation = scipyfft.irfft2(cross_power, s=shape, workers=-1)
+        
+        # The current strip matches the neighbor strip shifted right by (strip_width - overlap). Lag strip_width
+        # (no overlap) is left out, the hard column edges of the strips put a step artefact there that often wins
+        max_overlap = min(max_overlap, strip_width)
+        peaks = correlation[:, strip_width - max_overlap:strip_width].max(axis=0)
+        overlaps = np.arange(max_overlap, 0, -1)
+        top_peaks = overlaps[np.argsort(peaks)[::-1][:OVERLAP_PEAK_CANDIDATES]]
+        
+        # The strongest peak alone isn't reliable for small overlaps, so NCC score a window around each
+        # of the top peaks on the actual overlapping pixels and keep the best
+        candidates = set()
+        for peak in top_peaks.tolist():
+            candidates.update(range(max(peak - OVERLAP_REFINE_RADIUS, 1), min(peak + OVERLAP_REFINE_RADIUS, max_overlap) + 1))
+        best_overlap, best_score = int(top_peaks[0]), -np.inf
+        for overlap in sorted(candidates):
+            score = _ncc_score(current[:rows, -overlap:], neighbor[:rows, :overlap])
+            if score > best_score:
+                best_overlap, best_score = overlap, score
+        return best_overlap
+    
+    def auto_suggest_overlap(self):
+        """Set the overlap slider to the overlap found by phase correlating the current tile pair."""
+        neighbor = self.get_neighbor_for_current_direction()
+        if not neighbor:
+            self.info_var.set("No neighbor available in this direction to suggest an overlap.")
+            return
+        
+        current_img = self.get_image_for_tile(self.current_tile)
+        neighbor_img = self.get_image_for_tile(neighbor)
+        overlap = self.estimate_overlap(current_img, neighbor_img, self.direction_var.get() == "Horizontal")
+        
+        self.overlap_var.set(overlap)
+        self.overlap_entry.delete(0, tk.END)
+        self.overlap_entry.insert(0, str(overlap))
+        
+        self.update_preview()
+        self.info_var.set(f"Suggested overlap: {overlap} pixels. " + self.get_info_text())
+    
     def generate_tiles(self):
         """Generate tiles from screenshots for the selected tiles using current settings."""
         try:
@@ -577,6 +983,8 @@ class TileAlignmentGUI:
             if neighbor:
                 neighbor.create_tile()
             
+            # The cached images are stale now that the tiles exist on disk
+            self.clear_image_cache()
             # Update the preview with the newly generated tiles
             self.update_preview()
             self.info_var.set("Generated tiles successfully with current settings. " + self.get_info_text())
@@ -588,47 +996,58 @@ class TileAlignmentGUI:
 
 class ScreenshotProcessor():
     screenshots: list[Screenshot]
-    mapped_screenshots: dict[str, Screenshot]
+    mapped_screenshots: dict[tuple[int, int], Screenshot]
+    # Worldspace coordinates of self.screenshots as parallel arrays, in the same order
+    xs: np.ndarray
+    zs: np.ndarray
+    _tile_step_size: int|None
+    # LRU of the images loaded through the screenshots' screenshot_image/tile_image, oldest first
+    # (id(screenshot), slot name) -> screenshot, bounded by MAX_CACHED_TILES
+    _tile_cache: "OrderedDict[tuple[int, str], Screenshot]"
 
     def __init__(self, screenshots: list[Screenshot]|None = None):
         if screenshots is None:
             screenshots = []
         self.screenshots = screenshots
         self.mapped_screenshots = {}
+        self._tile_cache = OrderedDict()
         for screenshot in screenshots:
-            self.mapped_screenshots[screenshot.coordinate_string] = screenshot
+            self.mapped_screenshots[screenshot.coordinates] = screenshot
+            screenshot.attach_tile_cache(self._tile_cache)
         if len(screenshots) != len(self.mapped_screenshots):
             raise RuntimeError("WARNING: Duplicate screenshots found")
 
-        if len(screenshots) > 0:
-            self.sort()
+        self._tile_step_size = None
+        self.sort()
     
     @classmethod
     def from_directory(cls, directory: str):
         screenshot_processor = ScreenshotProcessor()
         
-        glob_match = os.path.join(directory, f"*/*.png")
-        matching_filepaths = glob.glob(glob_match)
-        if len(matching_filepaths) == 0:
-            raise print(f"ERROR: No screenshots found in {directory}")
-
-        print(f"Importing {len(matching_filepaths)} files")
-        for filepath in matching_filepaths:
-            # incoming screenshot filenames are in the format
-            # {prefix}_{x}_{z}.png - The original full resolution screenshot
-            # {prefix}_{x}_{z}_tile.png - The cropped tile
-            filename = os.path.basename(filepath)
-            filename_no_ext = os.path.splitext(filename)[0]
-            filename_elements = filename_no_ext.split("_")
-            if filename_elements[-1] == INTERMEDIATE_TILE_FILENAME_SUFFIX:
-                x = int(filename_elements[-3])
-                z = int(filename_elements[-2])
-                screenshot_processor.add_screenshot(Screenshot(x, z, tile_filepath=filepath))
-            else:
-                x = int(filename_elements[-2])
-                z = int(filename_elements[-1])
-                screenshot_processor.add_screenshot(Screenshot(x, z, screenshot_filepath=filepath))
-
+        # Screenshots are in {directory}/*/*.png, DirEntry gives us the names and types without a stat per file
+        file_count = 0
+        with os.scandir(directory) as subdirectories:
+            for subdirectory in subdirectories:
+                if subdirectory.name.startswith(".") or not subdirectory.is_dir():
+                    continue
+                with os.scandir(subdirectory.path) as entries:
+                    for entry in entries:
+                        match = SCREENSHOT_FILENAME_PATTERN.fullmatch(entry.name)
+                        if match is None:
+                            continue
+                        file_count += 1
+                        x, z = int(match[1]), int(match[2])
+                        if match[3]:
+                            screenshot_processor.add_screenshot(Screenshot(x, z, tile_filepath=entry.path), defer_sort=True)
+                        else:
+                            screenshot_processor.add_screenshot(Screenshot(x, z, screenshot_filepath=entry.path), defer_sort=True)
+
+        if file_count == 0:
+            raise RuntimeError(f"No screenshots found in {directory}")
+        print(f"Imported {file_count} files")
+
+        # sort once at the end instead of after every insert
+        screenshot_processor.sort()
         return screenshot_processor
         
     def __str__(self):
@@ -638,62 +1057,119 @@ class ScreenshotProcessor():
         return str(self)
 
 
-    def add_screenshot(self, screenshot: Screenshot):
-        if screenshot in self.mapped_screenshots:
+    def add_screenshot(self, screenshot: Screenshot, defer_sort: bool = False):
+        coordinates = screenshot.coordinates
+        existing_screenshot = self.mapped_screenshots.get(coordinates)
+        if existing_screenshot is not None:
+            existing_screenshot.merge_filepaths(screenshot)
             return
-        self.screenshots.append(screenshot)
-        self.mapped_screenshots[screenshot.coordinate_string] = screenshot
-        self.sort()
+        self.mapped_screenshots[coordinates] = screenshot
+        screenshot.attach_tile_cache(self._tile_cache)
+        if defer_sort:
+            # The caller must call sort() once all the screenshots have been added, which also rebuilds xs/zs
+            self.screenshots.append(screenshot)
+        else:
+            # The list is always kept sorted, so a binary search insert is enough
+            index = bisect.bisect_right(self.screenshots, self.sort_key(screenshot), key=self.sort_key)
+            self.screenshots.insert(index, screenshot)
+            self.xs = np.insert(self.xs, index, screenshot.xCoordWS)
+            self.zs = np.insert(self.zs, index, screenshot.zCoordWS)
+            self._tile_step_size = None
+
+    def clear_tile_cache(self):
+        """Close every image loaded through this processor's screenshots."""
+        while self._tile_cache:
+            (_, slot), screenshot = self._tile_cache.popitem(last=False)
+            screenshot._close_image(slot)
+
+    @staticmethod
+    def sort_key(screenshot: Screenshot) -> tuple[int, int]:
+        return (screenshot.xCoordWS, screenshot.zCoordWS)
 
     def sort(self):
-        self.screenshots = sorted(self.screenshots, key=lambda screenshot: (screenshot.xCoordWS, screenshot.zCoordWS))
+        count = len(self.screenshots)
+        xs = np.fromiter((screenshot.xCoordWS for screenshot in self.screenshots), dtype=np.int32, count=count)
+        zs = np.fromiter((screenshot.zCoordWS for screenshot in self.screenshots), dtype=np.int32, count=count)
+        # sort by x, then z
+        order = np.lexsort((zs, xs))
+        self.screenshots = [self.screenshots[i] for i in order]
+        self.xs = xs[order]
+        self.zs = zs[order]
+        # the step size is derived from the first two screenshots, so it depends on the order
+        self._tile_step_size = None
     
     def min_x(self):
-        # scan the list of screenshots and find the minimum x coordinate
-        return min([screenshot.xCoordWS for screenshot in self.screenshots
-                    if screenshot.xCoordWS is not None])
+        return int(self.xs.min())
     
     def max_x(self):
-        return max([screenshot.xCoordWS for screenshot in self.screenshots
-                    if screenshot.xCoordWS is not None])
+        return int(self.xs.max())
     
     def min_z(self):
-        return min([screenshot.zCoordWS for screenshot in self.screenshots
-                    if screenshot.zCoordWS is not None])
+        return int(self.zs.min())
     
     def max_z(self):
-        return max([screenshot.zCoordWS for screenshot in self.screenshots
-                    if screenshot.zCoordWS is not None])
+        return int(self.zs.max())
 
     @property
     def tile_step_size(self):
-        # take the first two tiles, and calculate the difference in x and z
-        tile_0 = self.screenshots[0]
-        tile_1 = self.screenshots[1]
-        x_diff = abs(tile_0.xCoordWS - tile_1.xCoordWS)
-        z_diff = abs(tile_0.zCoordWS - tile_1.zCoordWS)
-        # return which ever is larger
-        return max(x_diff, z_diff)
+        if self._tile_step_size is None:
+            # take the first two tiles, and calculate the difference in x and z
+            x_diff = abs(int(self.xs[0]) - int(self.xs[1]))
+            z_diff = abs(int(self.zs[0]) - int(self.zs[1]))
+            # return which ever is larger
+            self._tile_step_size = max(x_diff, z_diff)
+        return self._tile_step_size
 
     def count(self):
         return len(self.screenshots)
 
     def make_tiles(self):
+        self.create_all_tiles()
+
+        # only delete the originals once all the tiles have been written
+        if DELETE_ORIGINALS:
+            for screenshot in self.screenshots:
+                if screenshot.screenshot_filepath is not None:
+                    os.remove(screenshot.screenshot_filepath)
+
+    def create_all_tiles(self, workers: int|None = None):
+        """Crop the tiles for all screenshots in parallel, workers defaults to the CPU count."""
+        workers = workers or os.cpu_count() or 1
+        jobs = []
         for screenshot in self.screenshots:
+            if screenshot.screenshot_filepath is None:
+                continue
             if screenshot.tile_exists() and SKIP_EXISTING_TILES:
                 print(f"Skipping {screenshot.tile_filepath}")
-            else:
-                print(f"Creating cropped screenshot tile for coordinate {screenshot.xCoordWS}, {screenshot.zCoordWS}")
-                screenshot.create_tile()
+                continue
+            jobs.append((screenshot.screenshot_filepath, screenshot.tile_filepath, TILE_CROP_SIZE))
 
-            if DELETE_ORIGINALS and screenshot.screenshot_filepath is not None:
-                os.remove(screenshot.screenshot_filepath)
+        if len(jobs) == 0:
+            return
 
-    def composite_screenshot_tiles(self, tiles: list[Screenshot], output_filename: str):
-        tile_min_x = min([tile.xCoordWS for tile in tiles])
-        tile_min_z = min([tile.zCoordWS for tile in tiles])
-        tile_max_x = max([tile.xCoordWS for tile in tiles])
-        tile_max_z = max([tile.zCoordWS for tile in tiles])
+        print(f"Creating {len(jobs)} cropped screenshot tiles using {workers} workers")
+        # a few chunks per worker keeps them all busy without a round trip per tile
+        chunksize = max(1, len(jobs) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for tile_filepath in executor.map(_crop_one, jobs, chunksize=chunksize):
+                print(f"Created {tile_filepath}")
+
+    def unit_coordinates(self, min_x: int, min_z: int, step: int, indices: np.ndarray|None = None) -> np.ndarray:
+        """Grid coordinates of all (or the selected) screenshots relative to min_x/min_z, as an (N, 2) array of x, z."""
+        xs = self.xs if indices is None else self.xs[indices]
+        zs = self.zs if indices is None else self.zs[indices]
+        return np.stack([(xs - min_x) // step, (zs - min_z) // step], axis=1)
+
+    def composite_screenshot_tiles(self, indices: np.ndarray, output_filename: str):
+        # indices select the tiles to composite from self.screenshots, in ascending order so the tiles are pasted
+        # sorted by x then z like self.screenshots, which decides which tile wins where they overlap
+        tiles = [self.screenshots[i] for i in indices]
+        xs = self.xs[indices]
+        zs = self.zs[indices]
+        tile_min_x = int(xs.min())
+        tile_min_z = int(zs.min())
+        tile_max_x = int(xs.max())
+        tile_max_z = int(zs.max())
 
         # worldspace range
         x_ws_range = tile_max_x - tile_min_x
@@ -712,110 +1188,141 @@ class ScreenshotProcessor():
             output_image_size_x += (x_unit_range - 1) * TILE_OVERLAP
             output_image_size_z += (z_unit_range - 1) * TILE_OVERLAP
 
-        # create a new image with the size of the map
-        map_image = Image.new("RGB", (output_image_size_x, output_image_size_z), (0, 0, 0, 0))
-        sorted_tiles = sorted(tiles, key=lambda tile: (tile.xCoordWS, tile.zCoordWS))
-
-        for tile in sorted_tiles:
-            x, z = tile.get_unit_coordinates(tile_min_x, tile_min_z, self.tile_step_size)
+        unit_coordinates = self.unit_coordinates(tile_min_x, tile_min_z, self.tile_step_size, indices)
+        unit_x = unit_coordinates[:, 0]
+        # flip the z coordinate so that the origin is at the bottom left
+        unit_z = z_unit_range - unit_coordinates[:, 1] - 1
 
-            # flip the z coordinate so that the origin is at the bottom left
-            z = z_unit_range - z - 1
+        # OPTIONAL: TILE_OVERLAP accounts for how much we want to overlap the tiles
+        tile_stride = TILE_CROP_SIZE + TILE_OVERLAP
+        paste_x = unit_x * tile_stride
+        paste_z = unit_z * tile_stride
 
-            paste_tile_coord_x = int(x * TILE_CROP_SIZE)
-            paste_tile_coord_z = int(z * TILE_CROP_SIZE)
+        if tifffile is not None and output_filename.lower().endswith((".tif", ".tiff")):
+            self.write_tiled_map(tiles, paste_x, paste_z, (output_image_size_x, output_image_size_z), output_filename)
+            print(f"Saved tiles to {output_filename}")
+            return
 
-            # OPTIONAL: now account for how much we want to overlap the tiles
-            if TILE_OVERLAP != 0:
-                displacement_x = int(TILE_OVERLAP * x)
-                displacement_z = int(TILE_OVERLAP * z)
-                print(f"Adjusting tile coordinates by overlap of {displacement_x},{displacement_z} px")
-                paste_tile_coord_x += displacement_x
-                paste_tile_coord_z += displacement_z
+        # create a new image with the size of the map, the tiles are copied straight into its pixel array
+        map_pixels = np.zeros((output_image_size_z, output_image_size_x, 3), dtype=np.uint8)
 
-            print(f"Placing {tile.tile_filepath} at {paste_tile_coord_x}, {paste_tile_coord_z} (unit {x}, {z})")
-            map_image.paste(tile.tile_image, (paste_tile_coord_x, paste_tile_coord_z))
-            tile.unload()
+        # plain python ints, indexing the arrays per tile would box a numpy scalar each time
+        placements = zip(tiles, paste_x.tolist(), paste_z.tolist(), unit_x.tolist(), unit_z.tolist())
+        for tile, x, z, tile_unit_x, tile_unit_z in placements:
+            print(f"Placing {tile.tile_filepath} at {x}, {z} (unit {tile_unit_x}, {tile_unit_z})")
+            blit(map_pixels, tile.load_tile_pixels(), x, z)
         
         # save the map image
-        map_image.save(output_filename, quality=96)
+        Image.fromarray(map_pixels).save(output_filename, quality=90)
         print(f"Saved tiles to {output_filename}")
 
+    def write_tiled_map(self, tiles: list, paste_x: np.ndarray, paste_z: np.ndarray, size: tuple, output_filename: str):
+        """Stream the composite into a tiled BigTIFF one band of rows at a time.
+
+        Only the tiles crossing the current band are decoded, plus the rows of the previous band's tiles that
+        hang over into it, so memory stays at roughly one row of tiles however large the map is.
+        """
+        width, height = size
+        band_height = COMPOSITE_TIFF_TILE_SIZE
+        band_width = -(-width // band_height) * band_height
+        carried = {} # tile index -> (first row, pixels) of the rows below the band the tile was decoded in
+
+        def bands():
+            for top in range(0, height, band_height):
+                bottom = top + band_height
+                band = np.zeros((band_height, band_width, 3), dtype=np.uint8)
+                # the tiles starting in this band, plus whatever earlier tiles still hang over into it. A tile can be
+                # taller than TILE_CROP_SIZE (cropped with an earlier crop size), so the overhang goes by the decoded height
+                starting = np.flatnonzero((paste_z >= top) & (paste_z < bottom)).tolist()
+                # keep the paste order so overlapping tiles cover each other the same way as the in memory path
+                for i in sorted(carried.keys() | set(starting)):
+                    if i in carried:
+                        row, pixels = carried.pop(i)
+                    else:
+                        tile = tiles[i]
+                        print(f"Placing {tile.tile_filepath} at {paste_x[i]}, {paste_z[i]}")
+                        row, pixels = int(paste_z[i]), np.asarray(tile.load_tile_pixels())
+                    blit(band, pixels, int(paste_x[i]), row - top)
+                    if row + pixels.shape[0] > bottom:
+                        carried[i] = (bottom, pixels[bottom - row:].copy())
+                for left in range(0, band_width, band_height):
+                    yield band[:, left:left + band_height]
+
+        with tifffile.TiffWriter(output_filename, bigtiff=True) as tiff:
+            tiff.write(bands(), shape=(height, width, 3), dtype=np.uint8, photometric="rgb",
+                       tile=(band_height, band_height), compression="zlib")
+
 
     def make_large_map(self, filepath: str = "map.jpeg", x_coods_start: int = -1, z_coord_start: int = -1, max_x_tile_count: int = -1, max_z_tile_count: int = -1):
+        # Composite the tiles from x_coods_start/z_coord_start (worldspace), at most max_<axis>_tile_count tiles per axis
         if x_coods_start < 0 and z_coord_start < 0 and max_x_tile_count < 0 and max_z_tile_count < 0:
             print("Creating large map from all tiles")
-            self.composite_screenshot_tiles(self.screenshots, filepath)
+            self.composite_screenshot_tiles(np.arange(len(self.screenshots)), filepath)
             return
 
-        included_tiles = []
-        min_x_coord = -1
-        min_z_coord = -1
-        max_x_coord = -1
-        max_z_coord = -1
-        for screenshot in self.screenshots:
-            if x_coods_start > 0 and screenshot.xCoordWS < x_coods_start:
-                continue
-            if z_coord_start > 0 and screenshot.zCoordWS < z_coord_start:
-                continue
-            
-            # update our mins and maxes
-            if min_x_coord == -1 or screenshot.xCoordWS < min_x_coord:
-                min_x_coord = screenshot.xCoordWS
-            if min_z_coord == -1 or screenshot.zCoordWS < min_z_coord:
-                min_z_coord = screenshot.zCoordWS
-            if max_x_coord == -1 or screenshot.xCoordWS > max_x_coord:
-                max_x_coord = screenshot.xCoordWS
-            if max_z_coord == -1 or screenshot.zCoordWS > max_z_coord:
-                max_z_coord = screenshot.zCoordWS
-            
-            x_tile_count = int((max_x_coord - min_x_coord) / self.tile_step_size)
-            z_tile_count = int((max_z_coord - min_z_coord) / self.tile_step_size)
-
-            # print(f"min_x_coord: {min_x_coord}, min_z_coord: {min_z_coord}, max_x_coord: {max_x_coord}, max_z_coord: {max_z_coord}")
-            # print(f"Current axis tile counts: {x_tile_count}, {z_tile_count}")
-
-            if (max_x_tile_count == 0 or x_tile_count <= max_x_tile_count) or (max_z_tile_count == 0 or z_tile_count <= max_z_tile_count):
-                included_tiles.append(screenshot)
+        # any argument below zero is unset
+        mask = np.ones(len(self.screenshots), dtype=bool)
+        if x_coods_start >= 0:
+            mask &= self.xs >= x_coods_start
+        if z_coord_start >= 0:
+            mask &= self.zs >= z_coord_start
+        candidates = np.flatnonzero(mask)
+        if len(candidates) == 0:
+            raise RuntimeError(f"No tiles found from x {x_coods_start}, z {z_coord_start}")
+
+        # then cap the map to the first max_<axis>_tile_count tiles from the bottom left of what is left
+        xs = self.xs[candidates]
+        zs = self.zs[candidates]
+        min_x_coord, min_z_coord = int(xs.min()), int(zs.min())
+        if max_x_tile_count >= 0:
+            mask = (xs - min_x_coord) // self.tile_step_size < max_x_tile_count
+            candidates, xs, zs = candidates[mask], xs[mask], zs[mask]
+        if max_z_tile_count >= 0:
+            mask = (zs - min_z_coord) // self.tile_step_size < max_z_tile_count
+            candidates, xs, zs = candidates[mask], xs[mask], zs[mask]
+        if len(candidates) == 0:
+            raise RuntimeError(f"No tiles left after limiting the map to {max_x_tile_count}x{max_z_tile_count} tiles")
+
+        included_tiles = candidates
+        max_x_coord, max_z_coord = int(xs.max()), int(zs.max())
 
         print(f"Creating large map from {len(included_tiles)} tiles (min_x: {min_x_coord}, min_z: {min_z_coord}, max_x: {max_x_coord}, max_z: {max_z_coord})")
         self.composite_screenshot_tiles(included_tiles, filepath)
 
-    def make_initial_tiles(self, output_directory: str, initial_z_dirname: int):
+    def make_initial_tiles(self, output_directory: str, initial_z_dirname: int, workers: int|None = None):
         # Initial z should usually be 5, as we support 5 levels of detail
-        for screenshot in self.screenshots:
-            normalized_x = int(screenshot.xCoordWS / self.tile_step_size)
-            normalized_z = int(screenshot.zCoordWS / self.tile_step_size)
-
+        workers = workers or os.cpu_count() or 1
+        target_size = TILE_CROP_SIZE + TILE_OVERLAP
+        jobs = []
+        # truncated towards zero like int(), for every screenshot at once
+        normalized_xs = (self.xs / self.tile_step_size).astype(np.int64).tolist()
+        normalized_zs = (self.zs / self.tile_step_size).astype(np.int64).tolist()
+        for screenshot, normalized_x, normalized_z in zip(self.screenshots, normalized_xs, normalized_zs):
             # Folder structure is output_directory/initial_z_dirname/normalized_x/normalized_z
             # i.e. output_directory/5/0/0/tile.jpg
             intial_tile_filepath = os.path.join(output_directory, str(initial_z_dirname), str(normalized_x), str(normalized_z), f"{FINAL_TILE_FILENAME}.{FINAL_TILE_IMAGE_TYPE}")
             # copy the tile to the new folder
-            if not os.path.exists(intial_tile_filepath):
-                tile_directory_path = os.path.dirname(intial_tile_filepath)
-                os.makedirs(tile_directory_path, exist_ok=True)
-
-                print(f"Converting {screenshot.tile_filepath} to {intial_tile_filepath}")
-                image = Image.open(screenshot.tile_filepath)
+            if os.path.exists(intial_tile_filepath):
+                continue
+            tile_directory_path = os.path.dirname(intial_tile_filepath)
+            os.makedirs(tile_directory_path, exist_ok=True)
+            jobs.append((screenshot.tile_filepath, intial_tile_filepath, target_size))
 
-                
-                target_size = TILE_CROP_SIZE + TILE_OVERLAP
-                image_size = image.size
-                if image_size[0] != target_size or image_size[1] != target_size:
-                    left = (image_size[0] - target_size) / 2
-                    top = (image_size[1] - target_size) / 2
-                    right = (image_size[0] + target_size) / 2
-                    bottom = (image_size[1] + target_size) / 2
-                    image = image.crop((left, top, right, bottom))
+        if len(jobs) == 0:
+            return
 
-                image.save(intial_tile_filepath, quality=95)
+        print(f"Converting {len(jobs)} tiles using {workers} workers")
+        chunksize = max(1, len(jobs) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for intial_tile_filepath in executor.map(_crop_worker, jobs, chunksize=chunksize):
+                print(f"Converted {intial_tile_filepath}")
 
     def auto_find_crop(self):
         # Find the highest detail screenshot
         
         # highest_detail_screenshot, highest_detail = self.find_highest_detail_screenshot()
         
-        source_screenshot = self.mapped_screenshots[Screenshot.make_coordinate_string(5700, 3800)]
+        source_screenshot = self.mapped_screenshots[(5700, 3800)]
         
         # Then pick the z neighbour in either direction
         screenshot_above = self.find_neighbour(source_screenshot, 0, self.tile_step_size)
@@ -841,17 +1348,13 @@ class ScreenshotProcessor():
         print(f"Best match row: {best_match_index}, Best match score: {best_match_score}")
         
         # Visualize the match
-        visualization = self.visualize_match(source_screenshot.screenshot_filepath, source_row, neighbour_screenshot.screenshot_filepath, best_match_index)
+        visualization = self.visualize_match(source_screenshot, source_row, neighbour_screenshot, best_match_index)
         visualization.show()
     
     def find_neighbour(self, screenshot: Screenshot, x_offset: int, z_offset: int) -> Screenshot:
         x = screenshot.xCoordWS + x_offset
         z = screenshot.zCoordWS + z_offset
-        neighbour_coordinate_lookup = Screenshot.make_coordinate_string(x, z)
-        try:
-            return self.mapped_screenshots[neighbour_coordinate_lookup]
-        except KeyError:
-            return None 
+        return self.mapped_screenshots.get((x, z))
 
     def find_highest_detail_screenshot(self) -> tuple[Screenshot, float]:
         max_detail = ()
@@ -867,44 +1370,49 @@ class ScreenshotProcessor():
         Measure the detail of a screenshot by calculating the average pixel intensity of the edge image
         """
         image_path = screenshot.screenshot_filepath
-        img = Image.open(image_path)
-        # Convert to grayscale for edge detection
-        gray_img = img.convert("L")
+        target_size = TILE_CROP_SIZE // 4
+        with Image.open(image_path) as img:
+            # JPEGs decode straight to grayscale at a reduced DCT scale, anything else (PNG) is box reduced after decoding
+            img.draft("L", (target_size, target_size))
+            factor = max(1, min(img.width, img.height) // target_size)
+            # Convert to grayscale for edge detection
+            gray_img = img.convert("L").reduce(factor)
         # Apply edge detection filter
-        edge_img = gray_img.filter(ImageFilter.FIND_EDGES)
-        # Calculate the average pixel value in the edge image
-        edge_intensity = sum(edge_img.getdata()) / (edge_img.width * edge_img.height)
+        if cv2 is not None:
+            # SIMD filter that saturates to uint8 like Pillow, which also keeps the source pixels on the 1px border
+            gray = np.asarray(gray_img)
+            edges = cv2.filter2D(gray, -1, FIND_EDGES_KERNEL)
+            edges[[0, -1]] = gray[[0, -1]]
+            edges[:, [0, -1]] = gray[:, [0, -1]]
+        else:
+            edges = np.asarray(gray_img.filter(ImageFilter.FIND_EDGES), dtype=np.uint8)
+        # Calculate the average pixel value in the edge image, reduced in C rather than per pixel in Python
+        edge_intensity = float(edges.mean())
         return edge_intensity
 
     
     def frequency_analysis(self, screenshot: Screenshot):
         image_path = screenshot.screenshot_filepath
-        img = Image.open(image_path).convert("L")
-        img_array = np.array(img)
+        with Image.open(image_path) as img:
+            img_array = np.asarray(img.convert("L"), dtype=np.float32)
         
-        # Apply FFT to get frequency domain representation
-        f_transform = fftpack.fft2(img_array)
-        f_transform_shifted = fftpack.fftshift(f_transform)
+        # Apply FFT to get frequency domain representation, the image is real so only half of the spectrum is needed
+        f_transform = scipyfft.rfft2(img_array, workers=-1)
         
         # Calculate magnitudes of frequency components
-        magnitude = np.abs(f_transform_shifted)
+        magnitude = np.abs(f_transform)
         
-        # Separate high frequency components (center is low frequency)
-        h, w = magnitude.shape
-        center_h, center_w = h//2, w//2
-        
-        # Create a mask for high frequency components
-        radius = min(center_h, center_w) // 3  # Adjust this threshold as needed
-        y, x = np.ogrid[:h, :w]
-        mask = ((y - center_h)**2 + (x - center_w)**2) > radius**2
+        # Separate high frequency components from the low ones around the zero frequency
+        h, w = img_array.shape
+        radius = min(h // 2, w // 2) // 3  # Adjust this threshold as needed
+        column_weights, high_freq_weights = high_frequency_weights(h, w, radius)
         
         # Calculate high frequency energy
-        high_freq_energy = np.sum(magnitude * mask)
-        total_energy = np.sum(magnitude)
+        high_freq_energy = magnitude.ravel() @ high_freq_weights.ravel()
+        total_energy = (magnitude @ column_weights).sum()
         
         return high_freq_energy / total_energy
 
-
     def find_best_matching_row(self, source_screenshot: Screenshot, source_row_index: int, target_screenshot: Screenshot):
         """
         Find the best matching row in the target image for a given row from the source image.
@@ -926,8 +1434,8 @@ class ScreenshotProcessor():
             Index of the best matching row in the target image
         best_match_score : float
             Score of the best match (interpretation depends on metric)
-        all_scores : list
-            List of scores for all rows in the target image
+        all_scores : np.ndarray
+            Scores for all rows in the target image
         """
         
         source_img = source_screenshot.screenshot_image
@@ -944,72 +1452,40 @@ class ScreenshotProcessor():
             target_img = target_img.resize((source_img.width, target_img.height))
             target_array = np.array(target_img)
         
-        # Extract the source row
+        # Extract the source row, and treat grayscale images as single channel
         source_row = source_array[source_row_index]
-        
-        # Calculate scores for each row in the target image
-        scores = []
-        
-        for i in range(target_array.shape[0]):
-            target_row = target_array[i]
-            
-            # use normalized cross-correlation (NCC) (higher is better)
-            
-            # Handle multi-channel images
-            if len(source_row.shape) > 1:
-                # Calculate NCC for each channel and average
-                channel_scores = []
-                for c in range(source_row.shape[-1]):
-                    src = source_row[..., c].astype(float)
-                    tgt = target_row[..., c].astype(float)
-                    
-                    src_norm = src - np.mean(src)
-                    tgt_norm = tgt - np.mean(tgt)
-                    
-                    numerator = np.sum(src_norm * tgt_norm)
-                    denominator = np.sqrt(np.sum(src_norm**2) * np.sum(tgt_norm**2))
-                    
-                    # Avoid division by zero
-                    if denominator == 0:
-                        channel_scores.append(0)
-                    else:
-                        channel_scores.append(numerator / denominator)
-                
-                score = np.mean(channel_scores)
-            else:
-                src = source_row.astype(float)
-                tgt = target_row.astype(float)
-                
-                src_norm = src - np.mean(src)
-                tgt_norm = tgt - np.mean(tgt)
-                
-                numerator = np.sum(src_norm * tgt_norm)
-                denominator = np.sqrt(np.sum(src_norm**2) * np.sum(tgt_norm**2))
-                
-                # Avoid division by zero
-                if denominator == 0:
-                    score = 0
-                else:
-                    score = numerator / denominator
-                    
-            scores.append(score)
+        if target_array.ndim == 2:
+            target_array = target_array[..., np.newaxis]
+            source_row = source_row[..., np.newaxis]
+        
+        # use normalized cross-correlation (NCC) (higher is better), computed per channel for
+        # every target row at once and then averaged over the channels. float32 is plenty for 8 bit pixels
+        src_norm = source_row.astype(np.float32)
+        src_norm -= src_norm.mean(axis=0)
+        src_den = np.sqrt(np.einsum('wc,wc->c', src_norm, src_norm))
+        tgt_norm = target_array.astype(np.float32)
+        tgt_norm -= tgt_norm.mean(axis=1, keepdims=True)
+        
+        # numba spreads the rows over all cores when it is installed, otherwise this is the einsum version
+        channel_scores = _score_rows(tgt_norm, np.ascontiguousarray(src_norm), src_den)
+        scores = channel_scores.mean(axis=1)
         
         # NCC, higher is better
-        best_match_index = np.argmax(scores)
+        best_match_index = int(np.argmax(scores))
         best_match_score = scores[best_match_index]
         
         return best_match_index, best_match_score, scores
 
-    def visualize_match(self, source_image_path, source_row, target_image_path, target_row):
+    def visualize_match(self, source_screenshot: Screenshot, source_row: int, target_screenshot: Screenshot, target_row: int):
         """
         Create a visualization of the matching rows from both images.
         
         Parameters:
         -----------
-        source_image_path : str
-            Path to the source image
-        target_image_path : str
-            Path to the target image
+        source_screenshot : Screenshot
+            The source screenshot, its already loaded screenshot_image is reused
+        target_screenshot : Screenshot
+            The target screenshot
         source_row : int
             Index of the row in the source image
         target_row : int
@@ -1020,51 +1496,38 @@ class ScreenshotProcessor():
         visualization : PIL.Image
             An image highlighting the matching rows in both images
         """
-        # Open images
-        source_img = Image.open(source_image_path)
-        target_img = Image.open(target_image_path)
-        
-        # Convert to numpy arrays for manipulation
-        source_array = np.array(source_img)
-        target_array = np.array(target_img)
-        
-        # Create copies for highlighting
-        source_highlight = source_array.copy()
-        target_highlight = target_array.copy()
-        
-        # Highlight the rows (make them red for visibility)
-        if len(source_array.shape) == 3:  # Color image
-            source_highlight[source_row, :, 0] = 255  # Red channel
-            source_highlight[source_row, :, 1] = 0    # Green channel
-            source_highlight[source_row, :, 2] = 0    # Blue channel
-            
-            target_highlight[target_row, :, 0] = 255
-            target_highlight[target_row, :, 1] = 0
-            target_highlight[target_row, :, 2] = 0
+        # Convert to numpy arrays for manipulation, these are read only views of the decoded images
+        source_array = np.asarray(source_screenshot.screenshot_image)
+        target_array = np.asarray(target_screenshot.screenshot_image)
+        
+        # Create a new image to show both side by side, only the shorter image needs padding to the same height
+        height = max(source_array.shape[0], target_array.shape[0])
+        padded = []
+        for array in (source_array, target_array):
+            if array.shape[0] < height:
+                array = np.pad(array, ((0, height - array.shape[0]),) + ((0, 0),) * (array.ndim - 1))
+            padded.append(array)
+        visualization = np.hstack(padded)
+        source_highlight = visualization[:source_array.shape[0], :source_array.shape[1]]
+        target_highlight = visualization[:target_array.shape[0], source_array.shape[1]:]
+        
+        # Highlight the rows in place (make them red for visibility)
+        if source_array.ndim == 3:  # Color image
+            red = np.zeros(source_array.shape[2], dtype=np.uint8)
+            red[0] = 255
+            if len(red) == 4:
+                red[3] = 255 # keep the highlight opaque
+            source_highlight[source_row] = red
+            target_highlight[target_row] = red
         else:  # Grayscale image
-            source_highlight[source_row, :] = 255
-            target_highlight[target_row, :] = 255
-        
-        # Create a new image to show both side by side
-        if len(source_array.shape) == 3:
-            height = max(source_array.shape[0], target_array.shape[0])
-            width = source_array.shape[1] + target_array.shape[1]
-            visualization = np.zeros((height, width, 3), dtype=np.uint8)
-            
-            visualization[:source_array.shape[0], :source_array.shape[1]] = source_highlight
-            visualization[:target_array.shape[0], source_array.shape[1]:] = target_highlight
-        else:
-            height = max(source_array.shape[0], target_array.shape[0])
-            width = source_array.shape[1] + target_array.shape[1]
-            visualization = np.zeros((height, width), dtype=np.uint8)
-            
-            visualization[:source_array.shape[0], :source_array.shape[1]] = source_highlight
-            visualization[:target_array.shape[0], source_array.shape[1]:] = target_highlight
+            source_highlight[source_row] = 255
+            target_highlight[target_row] = 255
         
         return Image.fromarray(visualization)
 
     def launch_alignment_gui(self):
         """Launch the tile alignment GUI tool."""
+        init_gui()
         root = tk.Tk()
         try:
             from PIL import ImageDraw  # Import here to avoid import errors if not using GUI
@@ -1073,6 +1536,9 @@ class ScreenshotProcessor():
         except Exception as e:
             print(f"Error launching GUI: {e}")
             root.destroy()
+        finally:
+            # the GUI loads screenshots ad hoc, don't keep them open once it's closed
+            self.clear_tile_cache()
 
 
 if __name__ == "__main__":
@@ -1082,6 +1548,7 @@ if __name__ == "__main__":
     parser.add_argument("output_dir", help="The directory containing the screenshots to crop")
     parser.add_argument("-f", "--find-crop", help="Automatically find the crop size", action="store_true")
     parser.add_argument("-m", "--make_map", help="Create a large map from the screenshots instead of the final tiles", action="store_true")
+    parser.add_argument("--map-filename", help="Filename of the large map written to the output directory, a .tif/.tiff map is streamed to disk when tifffile is installed", default="test_map.png")
     parser.add_argument("-g", "--gui", help="Launch the tile alignment GUI", action="store_true")
     args = parser.parse_args()
 
@@ -1102,7 +1569,7 @@ if __name__ == "__main__":
 
     if args.make_map:
         print("Making large test map")
-        screenshot_processor.make_large_map(os.path.join(args.output_dir, "test_map.png"))
+        screenshot_processor.make_large_map(os.path.join(args.output_dir, args.map_filename))
     else:
         print("Creating initial tiles")
         screenshot_processor.make_initial_tiles(args.output_dir, 0)
@@ -440,8 +440,8 @@ class ScreenshotProcessor():
         x_unit_range = int(x_ws_range / self.tile_step_size) + 1
         z_unit_range = int(z_ws_range / self.tile_step_size) + 1
 
-        # create a new image with the size of the map
-        map_image = Image.new("RGB", (x_unit_range * get_tile_size(), z_unit_range * get_tile_size()), (0, 0, 0, 0))
+        # create a new image with the size of the map, Pillow fills it with black
+        map_image = Image.new("RGB", (x_unit_range * get_tile_size(), z_unit_range * get_tile_size()))
         sorted_tiles = sorted(tiles, key=lambda tile: (tile.xCoordWS, tile.zCoordWS))
 
         for tile in sorted_tiles:
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import crop_screenshots
+from crop_screenshots import Screenshot, ScreenshotProcessor
+
+
+def make_tile_processor(directory, tile_sizes: dict) -> ScreenshotProcessor:
+    # tile only screenshots, (x, z) -> (width, height) of the intermediate tile written for it
+    rng = np.random.default_rng(0)
+    screenshots = []
+    for (x, z), (width, height) in tile_sizes.items():
+        tile_filepath = str(directory / f"Shot_{x}_{z}_tile.png")
+        Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8)).save(tile_filepath)
+        screenshots.append(Screenshot(x, z, tile_filepath=tile_filepath))
+    return ScreenshotProcessor(screenshots)
+
+
+def test_tiled_map_matches_in_memory_map_with_a_taller_tile(tmp_path):
+    pytest.importorskip("tifffile")
+    crop = crop_screenshots.TILE_CROP_SIZE
+    # the top left tile was cropped with an earlier, larger crop size and hangs over more than one band below it
+    tall = 2 * crop_screenshots.COMPOSITE_TIFF_TILE_SIZE + 100
+    processor = make_tile_processor(tmp_path, {
+        (0, 0): (crop, crop),
+        (0, 100): (crop, tall),
+        (100, 0): (crop, crop),
+        (100, 100): (crop, crop),
+    })
+    indices = np.arange(processor.count())
+
+    processor.composite_screenshot_tiles(indices, str(tmp_path / "map.png"))
+    processor.composite_screenshot_tiles(indices, str(tmp_path / "map.tif"))
+
+    expected = np.asarray(Image.open(tmp_path / "map.png"))
+    actual = crop_screenshots.tifffile.imread(tmp_path / "map.tif")
+    assert actual.shape == expected.shape
+    np.testing.assert_array_equal(actual, expected)